@@ -0,0 +1,44 @@
+# ============================================================
+# Memory benchmark: RSS for N microphone sessions in one process
+# ============================================================
+# Loads the Vosk models once, then adds one session's worth of recognizers
+# at a time and prints the resident set size after each, which is what
+# MIC_SESSIONS costs on top of a single-mic translator. Each recognizer is fed
+# a second of silence so its decoder state is allocated. Needs the same
+# models as translatorfull.py; Linux only (reads /proc/self/status).
+#
+#   python bench_sessions.py        # N = 1, 2, 3
+#   python bench_sessions.py 4      # N = 1 .. 4
+
+import sys
+
+import translatorfull as tf
+
+SILENCE = bytes(2 * 16000)
+
+def run(max_sessions):
+    base = tf.current_rss_mb()
+    paths = tf.vosk_model_paths(False)
+    models = tuple(tf.load_vosk_model(path) for path in paths)
+    loaded = tf.current_rss_mb()
+
+    rows = []
+    sessions = []
+    for n in range(1, max_sessions + 1):
+        recs = tf.make_recognizers(models)
+        for rec in recs:
+            rec.AcceptWaveform(SILENCE)
+        sessions.append(recs)
+        rows.append((n, tf.current_rss_mb()))
+
+    print()
+    print(f"models: {', '.join(paths)}")
+    print(f"baseline {base:.0f} MB, models loaded {loaded:.0f} MB (+{loaded - base:.0f} MB)")
+    print(f"{'N':>3} {'RSS':>8} {'vs N=1':>8} {'per mic':>8}")
+    first = rows[0][1]
+    for n, rss in rows:
+        per_mic = (rss - loaded) / n
+        print(f"{n:>3} {rss:>6.0f}MB {rss - first:>+6.0f}MB {per_mic:>6.1f}MB")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
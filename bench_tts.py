@@ -0,0 +1,51 @@
+# ============================================================
+# TTS benchmark: whole-text vs sentence-pipelined playback
+# ============================================================
+# Speaks each paragraph once through the old whole-text path and once through
+# the pipelined path and prints time-to-first-audio and total duration.
+# Needs the piper binary + voice in ./piper (or piper_windows_amd64) and a
+# working audio output, same as translatorfull.py.
+#
+#   python bench_tts.py            # built-in paragraphs
+#   python bench_tts.py FILE...    # one paragraph per file
+
+import sys
+
+import tts
+
+PARAGRAPHS = [
+    "Welcome to the service counter. Please keep your token number ready. "
+    "If you have come to renew a document, go to window three. "
+    "For new applications, fill in the green form first, then wait for your number to be called. "
+    "Payments can be made in cash or by card at window five.",
+
+    "The train to Delhi is running forty minutes late because of fog near Agra, "
+    "and the platform has been changed from two to six. "
+    "Passengers with reserved seats should check the new coach positions on the display board. "
+    "Food stalls on platform six will stay open until the train leaves. "
+    "Please do not leave your luggage unattended at any time.",
+]
+
+def run(paragraphs):
+    rows = []
+    for i, text in enumerate(paragraphs, 1):
+        for pipelined in (False, True):
+            tts.TTS_PIPELINED = pipelined
+            stats = tts.speak_text_en(text)
+            rows.append((i, stats))
+
+    print()
+    print(f"{'para':>4} {'path':<10} {'chunks':>6} {'chars':>5} {'first audio':>12} {'total':>8}")
+    for i, s in rows:
+        print(f"{i:>4} {s['path']:<10} {s['chunks']:>6} {s['chars']:>5} "
+              f"{s['first_audio']:>11.2f}s {s['total']:>7.2f}s")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        paragraphs = []
+        for name in sys.argv[1:]:
+            with open(name, encoding="utf-8") as f:
+                paragraphs.append(" ".join(f.read().split()))
+    else:
+        paragraphs = PARAGRAPHS
+    run(paragraphs)
@@ -0,0 +1,254 @@
+# ============================================================
+# Echo suppression + barge-in for the translator microphone loop
+# ============================================================
+# While the device is talking, microphone frames are gated so the recognizers
+# never hear its own voice. The known TTS output is fed to an NLMS echo
+# canceller; if what is left after cancellation is clearly louder than the
+# echo residual, the user is talking over us and TTS is stopped (barge-in).
+# When no echo path can be found at all (headset, muted or far speaker) the
+# frames are passed straight through and barge-in falls back to plain energy.
+
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+MIC_RATE = 16000
+ECHO_TAPS = 256
+ECHO_MU = 0.5
+ECHO_BLOCK = 16
+ECHO_MAX_DELAY = 0.5
+ECHO_MIN_CORR = 0.3
+ECHO_NO_ECHO_FRAMES = 6
+ECHO_TAIL = 0.25
+ECHO_HANGOVER = 0.3
+ECHO_WARMUP_FRAMES = 4
+ECHO_COUPLING_FALL = 0.3
+ECHO_COUPLING_RISE = 0.02
+ECHO_DOUBLE_TALK = 1.5
+BARGE_IN_RATIO = 2.5
+BARGE_IN_MIN_RMS = 500
+BARGE_IN_FRAMES = 3
+
+def pcm_rms(samples):
+    return float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+
+# ================= ECHO CANCELLER =================
+class EchoCanceller:
+
+    def __init__(self, rate=MIC_RATE, clock=time.monotonic):
+        self.rate = rate
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.generation += 1
+            self.w = np.zeros(ECHO_TAPS)
+            # Reference timeline at self.rate: ref[:n] is valid, the rest is
+            # spare capacity so pushes do not copy the whole utterance.
+            self.ref = np.zeros(0)
+            self.n = 0
+            self.t0 = None
+            self.t_end = None
+            self.delay = None
+            self.missed = 0
+
+    def push_reference(self, pcm, rate):
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+        if rate != self.rate and len(x):
+            n = int(round(len(x) * self.rate / rate))
+            x = np.interp(np.arange(n) * rate / self.rate, np.arange(len(x)), x)
+        with self.lock:
+            now = self.clock()
+            if self.t0 is None:
+                self.t0 = now
+            # The speaker went quiet once the buffered reference ran out, so a
+            # late block starts playing now, not where the last one ended.
+            start = max(self.n, int((now - self.t0) * self.rate))
+            end = start + len(x)
+            if end > len(self.ref):
+                grown = np.zeros(max(end, 2 * len(self.ref)))
+                grown[:self.n] = self.ref[:self.n]
+                self.ref = grown
+            self.ref[start:end] = x
+            self.n = end
+
+    def end_reference(self):
+        with self.lock:
+            if self.t0 is not None:
+                self.t_end = self.clock()
+
+    def playing(self, now):
+        if self.t0 is None:
+            return False
+        return self.t_end is None or now < self.t_end + ECHO_HANGOVER
+
+    @property
+    def no_echo(self):
+        """True once the reference was audible but never showed up at the mic."""
+        return self.delay is None and self.missed >= ECHO_NO_ECHO_FRAMES
+
+    def _reference(self, lo, hi):
+        seg = np.zeros(hi - lo)
+        a, b = max(lo, 0), min(hi, self.n)
+        if a < b:
+            seg[a - lo:b - lo] = self.ref[a:b]
+        return seg
+
+    def _estimate_delay(self, y, start):
+        max_delay = int(ECHO_MAX_DELAY * self.rate)
+        seg = self._reference(start - max_delay, start + len(y))
+        if pcm_rms(seg) < 1.0:
+            return None
+        size = 1 << (len(seg) + len(y)).bit_length()
+        corr = np.fft.irfft(np.fft.rfft(seg, size) * np.conj(np.fft.rfft(y, size)), size)
+        corr = corr[:len(seg) - len(y) + 1]
+        energy = np.concatenate([[0.0], np.cumsum(np.square(seg))])
+        window = energy[len(y):] - energy[:-len(y)]
+        window = np.maximum(window, 1e-3 * window.max())
+        score = corr / (np.sqrt(window * np.sum(np.square(y))) + 1e-9)
+        j = int(np.argmax(score))
+        if score[j] < ECHO_MIN_CORR:
+            self.missed += 1
+            return None
+        # Centre the filter a little before the main echo path.
+        return max(0, max_delay - j - ECHO_TAPS // 4)
+
+    def process(self, data, now, adapt=True):
+        """Return (cleaned frame, residual level, reference level or None)."""
+        y = np.frombuffer(data, dtype=np.int16).astype(np.float64)
+        with self.lock:
+            if self.t0 is None:
+                return data, pcm_rms(y), None
+            start = int((now - self.t0) * self.rate) - len(y)
+            if self.delay is None:
+                self.delay = self._estimate_delay(y, start)
+                if self.delay is None:
+                    return data, pcm_rms(y), None
+            base = start - self.delay
+            tail = int(ECHO_TAIL * self.rate)
+            seg = self._reference(base - max(ECHO_TAPS, tail) + 1, base + len(y))
+
+        X = np.lib.stride_tricks.sliding_window_view(seg[-(len(y) + ECHO_TAPS - 1):], ECHO_TAPS)[:, ::-1]
+        e = np.empty(len(y))
+        for i in range(0, len(y), ECHO_BLOCK):
+            Xb = X[i:i + ECHO_BLOCK]
+            eb = y[i:i + ECHO_BLOCK] - Xb @ self.w
+            if adapt:
+                # Each row gets its own NLMS step, normalised by its own
+                # ECHO_TAPS-window energy.
+                norms = np.einsum("ij,ij->i", Xb, Xb) + 1e-3
+                self.w += ECHO_MU * (Xb.T @ (eb / norms)) / len(Xb)
+            e[i:i + ECHO_BLOCK] = eb
+
+        cleaned = np.clip(e, -32768, 32767).astype(np.int16).tobytes()
+        return cleaned, pcm_rms(e), pcm_rms(seg)
+
+# Every microphone has its own acoustic path, so each gets its own canceller;
+# the TTS reference signal is broadcast to all of them.
+ECHO_CANCELLERS = []
+
+def echo_reset():
+    for aec in ECHO_CANCELLERS:
+        aec.reset()
+
+def echo_push(pcm, rate):
+    for aec in ECHO_CANCELLERS:
+        aec.push_reference(pcm, rate)
+
+def echo_end():
+    for aec in ECHO_CANCELLERS:
+        aec.end_reference()
+
+# ================= INPUT GATE =================
+class EchoGuard:
+
+    def __init__(self, on_barge_in=None, canceller=None):
+        self.on_barge_in = on_barge_in
+        self.aec = canceller or EchoCanceller()
+        ECHO_CANCELLERS.append(self.aec)
+        self.pending = deque(maxlen=BARGE_IN_FRAMES)
+        self.generation = None
+        self.reset()
+
+    def reset(self):
+        self.pending.clear()
+        self.frames = 0
+        self.hits = 0
+        self.coupling = 0.0
+        self.double_talk = False
+        self.barged = False
+        self.passthrough = False
+
+    def barge_in(self, level, expected):
+        self.barged = True
+        print(f"[ECHO] barge-in level={level:.0f} expected={expected:.0f}")
+        if self.on_barge_in:
+            self.on_barge_in()
+
+    def filter(self, data):
+        """Return the frame(s) to feed the recognizers, or None while it is echo."""
+        now = self.aec.clock()
+
+        if self.generation != self.aec.generation:
+            self.generation = self.aec.generation
+            self.reset()
+
+        if not self.aec.playing(now):
+            if self.frames or self.pending:
+                self.reset()
+            return data
+
+        cleaned, level, ref_level = self.aec.process(data, now, adapt=not self.double_talk)
+        if self.barged:
+            return cleaned
+
+        if self.passthrough:
+            self.hits = self.hits + 1 if level > BARGE_IN_MIN_RMS else 0
+            if self.hits >= BARGE_IN_FRAMES:
+                self.barge_in(level, 0.0)
+            return data
+
+        self.pending.append(cleaned)
+
+        if ref_level is None:
+            if self.aec.no_echo:
+                # Nothing of ours reaches this mic: stop gating and only
+                # watch for the user's voice.
+                print("[ECHO] no echo path found, passing input through")
+                self.passthrough = True
+                frames = b"".join(self.pending)
+                self.pending.clear()
+                return frames
+            return None
+
+        # How much of the reference is left after cancellation when only the
+        # device is talking; near-end speech shows up well above that.
+        self.frames += 1
+        expected = self.coupling * ref_level
+        warm = self.frames > ECHO_WARMUP_FRAMES
+        self.double_talk = warm and level > ECHO_DOUBLE_TALK * expected
+
+        if warm and level > max(BARGE_IN_MIN_RMS, BARGE_IN_RATIO * expected):
+            self.hits += 1
+        else:
+            self.hits = 0
+            if not warm:
+                alpha = 1.0 / self.frames
+            elif level > expected:
+                alpha = ECHO_COUPLING_RISE
+            else:
+                alpha = ECHO_COUPLING_FALL
+            self.coupling += alpha * (level / max(ref_level, 1.0) - self.coupling)
+
+        if self.hits >= BARGE_IN_FRAMES:
+            self.barge_in(level, expected)
+            frames = b"".join(self.pending)
+            self.pending.clear()
+            return frames
+
+        return None
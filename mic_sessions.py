@@ -0,0 +1,80 @@
+# ============================================================
+# Multi-microphone plumbing for the translator
+# ============================================================
+# MIC_SESSIONS lists PyAudio input device indices, optionally pinned to a
+# language mode, e.g. "1:HI_TO_EN,3:EN_TO_HI". FairScheduler is the worker
+# pool the sessions share for translation and speech: sessions are served
+# round-robin and each session has at most one job running, so its utterances
+# come out in order and a chatty mic cannot starve the others.
+
+import threading
+from collections import deque, OrderedDict
+
+LANG_MODES = ("HI_TO_EN", "EN_TO_HI", "ES_TO_EN", "EN_TO_ES")
+
+def parse_mic_sessions(spec):
+    sessions = []
+    for item in filter(None, (x.strip() for x in spec.split(","))):
+        device, _, lang_mode = item.partition(":")
+        lang_mode = lang_mode.strip().upper() or None
+        if lang_mode is not None and lang_mode not in LANG_MODES:
+            raise ValueError(f"Unknown language mode {lang_mode!r} in MIC_SESSIONS "
+                             f"(expected one of {', '.join(LANG_MODES)})")
+        sessions.append((int(device), lang_mode))
+    return sessions or [(None, None)]
+
+class FairScheduler:
+    """Worker pool that serves sessions round-robin, one job per session at a time."""
+
+    def __init__(self, workers, name):
+        self.name = name
+        self.cond = threading.Condition()
+        self.queues = OrderedDict()
+        self.busy = set()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, session, job, replace=False, interrupt=None):
+        """Queue job for session. Returns True if the session has a job running.
+
+        With replace, the session's pending jobs are dropped and, if one is
+        running, interrupt() is called before the lock is released, so it can
+        only ever hit the old job and never the one just queued.
+        """
+        with self.cond:
+            jobs = self.queues.setdefault(session, deque())
+            if replace:
+                jobs.clear()
+            jobs.append(job)
+            busy = session in self.busy
+            if replace and busy and interrupt:
+                interrupt()
+            self.cond.notify()
+            return busy
+
+    def _next(self):
+        for session in list(self.queues):
+            self.queues.move_to_end(session)
+            jobs = self.queues[session]
+            if jobs and session not in self.busy:
+                self.busy.add(session)
+                return session, jobs.popleft()
+        return None
+
+    def _work(self):
+        while True:
+            with self.cond:
+                item = self._next()
+                while item is None:
+                    self.cond.wait()
+                    item = self._next()
+
+            session, job = item
+            try:
+                job()
+            except Exception as e:
+                print(f"[{self.name}] {session.name}: {e}")
+            finally:
+                with self.cond:
+                    self.busy.discard(session)
+                    self.cond.notify_all()
@@ -0,0 +1,156 @@
+# ============================================================
+# Adaptive quality-of-service scheduler for the translator
+# ============================================================
+# When the Pi throttles, end-to-end latency climbs. The scheduler watches
+# per-utterance latency, CPU load and SoC temperature and steps down through
+# QOS_LEVELS to stay near QOS_TARGET_LATENCY, then steps back up once there is
+# headroom again. None in a level means "keep the default". What a level
+# actually changes (argos beam/threads, Vosk models) is up to apply_fn.
+
+import os
+import time
+import threading
+
+QOS_TARGET_LATENCY = float(os.environ.get("QOS_TARGET_LATENCY", "1.5"))
+QOS_RESTORE_MARGIN = 0.6
+QOS_LATENCY_ALPHA = 0.3
+QOS_TEMP_HIGH = 75.0
+QOS_TEMP_LOW = 65.0
+QOS_LOAD_HIGH = 1.0
+QOS_LOAD_LOW = 0.7
+QOS_INTERVAL = 5.0
+QOS_DEGRADE_HOLD = 10.0
+QOS_RESTORE_HOLD = 30.0
+THERMAL_PATH = os.environ.get("QOS_THERMAL_PATH", "/sys/class/thermal/thermal_zone0/temp")
+
+QOS_LEVELS = [
+    {"name":"full",    "beam":None, "threads":None, "extras":True,  "small_vosk":False},
+    {"name":"beam2",   "beam":2,    "threads":None, "extras":True,  "small_vosk":False},
+    {"name":"lean",    "beam":1,    "threads":2,    "extras":False, "small_vosk":False},
+    {"name":"minimal", "beam":1,    "threads":1,    "extras":False, "small_vosk":True},
+]
+
+def read_temperature(path=THERMAL_PATH):
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+def read_cpu_load():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+class QoSScheduler:
+
+    def __init__(self, target=QOS_TARGET_LATENCY, thermal_path=THERMAL_PATH,
+                 load_fn=read_cpu_load, clock=time.monotonic, apply_fn=None):
+        self.target = target
+        self.thermal_path = thermal_path
+        self.load_fn = load_fn
+        self.clock = clock
+        self.apply_fn = apply_fn
+        self.level = 0
+        self.latency = None
+        # After a degrade for slowness, "no utterances yet" is not headroom:
+        # restoring waits for a fast utterance measured at the current level.
+        self.slow_degrade = False
+        self.fast_seen = False
+        self.last_change = self.last_check = clock()
+        # Latencies arrive from every MT worker and ticks from the main loop.
+        # apply_fn runs outside self.lock, under its own lock, so a slow apply
+        # never holds up the workers reporting latency.
+        self.lock = threading.RLock()
+        self.apply_lock = threading.Lock()
+        self.applied = 0
+
+    @property
+    def extras(self):
+        return QOS_LEVELS[self.level]["extras"]
+
+    @property
+    def small_vosk(self):
+        return QOS_LEVELS[self.level]["small_vosk"]
+
+    def record_latency(self, seconds):
+        with self.lock:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += QOS_LATENCY_ALPHA * (seconds - self.latency)
+            if seconds <= self.target * QOS_RESTORE_MARGIN:
+                self.fast_seen = True
+            self._evaluate(f"utterance={seconds:.2f}s", log_hold=True)
+        self._apply()
+
+    def tick(self):
+        with self.lock:
+            if self.clock() - self.last_check >= QOS_INTERVAL:
+                self._evaluate("periodic", False)
+        self._apply()
+
+    def evaluate(self, reason, log_hold=False):
+        with self.lock:
+            self._evaluate(reason, log_hold)
+        self._apply()
+
+    def _evaluate(self, reason, log_hold):
+        now = self.clock()
+        self.last_check = now
+        temp = read_temperature(self.thermal_path)
+        load = self.load_fn()
+
+        hot = temp is not None and temp >= QOS_TEMP_HIGH
+        busy = load is not None and load >= QOS_LOAD_HIGH
+        slow = self.latency is not None and self.latency > self.target
+        cool = temp is None or temp <= QOS_TEMP_LOW
+        idle = load is None or load <= QOS_LOAD_LOW
+        fast = self.latency is None or self.latency <= self.target * QOS_RESTORE_MARGIN
+        measured = self.fast_seen or not self.slow_degrade
+
+        causes = [n for n, hit in (("hot",hot),("busy",busy),("slow",slow)) if hit]
+        stats = (f"{reason} latency={self.latency if self.latency is None else round(self.latency, 2)} "
+                 f"load={load if load is None else round(load, 2)} temp={temp}")
+
+        if causes and self.level < len(QOS_LEVELS) - 1 and now - self.last_change >= QOS_DEGRADE_HOLD:
+            self.slow_degrade = self.slow_degrade or slow
+            self._set_level(self.level + 1, f"degrade ({'+'.join(causes)}) {stats}")
+        elif cool and idle and fast and measured and self.level > 0 and now - self.last_change >= QOS_RESTORE_HOLD:
+            self._set_level(self.level - 1, f"restore {stats}")
+        elif log_hold:
+            print(f"[QOS] hold level={QOS_LEVELS[self.level]['name']} {stats}")
+
+    def set_level(self, level, why):
+        with self.lock:
+            self._set_level(level, why)
+        self._apply()
+
+    def _set_level(self, level, why):
+        old = QOS_LEVELS[self.level]
+        new = QOS_LEVELS[level]
+        self.level = level
+        self.last_change = self.clock()
+        # Latency measured at the old level says nothing about the new one.
+        self.latency = None
+        self.fast_seen = False
+        if level == 0:
+            self.slow_degrade = False
+
+        print(f"[QOS] {old['name']} -> {new['name']}: {why} "
+              f"beam={new['beam']} threads={new['threads']} "
+              f"extras={new['extras']} small_vosk={new['small_vosk']}")
+
+    def _apply(self):
+        # Always applies the latest level, so a change that lost the race to
+        # a newer one is skipped instead of applied out of order.
+        if self.level == self.applied:
+            return
+        with self.apply_lock:
+            level = self.level
+            if level == self.applied:
+                return
+            self.applied = level
+            if self.apply_fn:
+                self.apply_fn(QOS_LEVELS[level])
@@ -0,0 +1,93 @@
+"""Regenerate the mixed-signal WAV fixtures used by tests/test_echo_cancel.py.
+
+reference.wav is what the TTS sends to the speaker (22050 Hz, like piper).
+Every other file is a 16 kHz mic capture of that playback: echo only through
+a few different paths, echo plus near-end speech starting at NEAR_START at a
+given level relative to the echo, and near-end speech with no echo at all.
+The gap_* files are the same playback with a GAP pause at GAP_START, as when
+piper has not finished the next sentence yet.
+
+    python tests/fixtures/make_echo_fixtures.py
+"""
+
+import os
+import wave
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TTS_RATE = 22050
+MIC_RATE = 16000
+DURATION = 5.0
+NEAR_START = 3.0
+GAP_START = 2.0
+GAP = 0.3
+NOISE_RMS = 30.0
+
+def speechlike(rng, n, rate, level):
+    """Band-limited noise with syllable and word envelopes."""
+    x = np.convolve(rng.standard_normal(n), np.ones(8) / 8, "same")
+    t = np.arange(n) / rate
+    syllables = np.abs(np.sin(2 * np.pi * rng.uniform(3.0, 4.5) * t + rng.uniform(0, np.pi)))
+    words = 0.4 + 0.6 * (np.sin(2 * np.pi * 0.7 * t + rng.uniform(0, np.pi)) > -0.5)
+    x *= syllables * words
+    return x * level / np.sqrt(np.mean(x ** 2))
+
+def write_wav(name, samples, rate):
+    data = np.clip(np.round(samples), -32768, 32767).astype("<i2")
+    with wave.open(os.path.join(HERE, name), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(data.tobytes())
+
+def echo_through(ref16, delay, taps):
+    delayed = np.concatenate([np.zeros(delay), ref16])[:len(ref16)]
+    return np.convolve(delayed, taps)[:len(ref16)]
+
+def main():
+    rng = np.random.default_rng(2024)
+    n_mic = int(DURATION * MIC_RATE)
+
+    ref = speechlike(rng, int(DURATION * TTS_RATE), TTS_RATE, 4000.0)
+    write_wav("reference.wav", ref, TTS_RATE)
+    ref = np.round(ref)
+    ref16 = np.interp(np.arange(n_mic) * TTS_RATE / MIC_RATE, np.arange(len(ref)), ref)
+
+    room = np.exp(-np.arange(200) / 40.0) * rng.standard_normal(200) * 0.08
+    room[0] = 0.5
+    paths = {
+        "g03": (100, np.array([0.3])),
+        "g06": (100, np.array([0.6])),
+        "room": (int(0.15 * MIC_RATE), room),
+    }
+
+    near_start = int(NEAR_START * MIC_RATE)
+    near = np.zeros(n_mic)
+    near[near_start:] = speechlike(rng, n_mic - near_start, MIC_RATE, 1.0)
+    noise = rng.standard_normal(n_mic) * NOISE_RMS
+
+    for name, (delay, taps) in paths.items():
+        echo = echo_through(ref16, delay, taps)
+        write_wav(f"echo_only_{name}.wav", echo + noise, MIC_RATE)
+        echo_rms = np.sqrt(np.mean(echo[near_start:] ** 2))
+        for label, db in (("m2db", -2.0), ("0db", 0.0), ("p1p5db", 1.5)):
+            gain = echo_rms * 10 ** (db / 20)
+            write_wav(f"near_{label}_{name}.wav", echo + near * gain + noise, MIC_RATE)
+
+    # Playback stalls for GAP, then resumes with the rest of the reference.
+    split = int(GAP_START * MIC_RATE)
+    played = np.concatenate([ref16[:split], np.zeros(int(GAP * MIC_RATE)), ref16[split:]])
+    gap_noise = rng.standard_normal(len(played)) * NOISE_RMS
+    gap_near = np.concatenate([np.zeros(len(played) - n_mic), near])
+    delay, taps = paths["g03"]
+    echo = echo_through(played, delay, taps)
+    write_wav("gap_echo_only_g03.wav", echo + gap_noise, MIC_RATE)
+    write_wav("gap_near_0db_g03.wav", echo + gap_near * np.sqrt(np.mean(echo[split:] ** 2)) + gap_noise,
+              MIC_RATE)
+
+    # Headset / muted speaker: the mic never hears the reference.
+    write_wav("no_echo_near.wav", near * 1500.0 + noise, MIC_RATE)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from echo_cancel import EchoCanceller, EchoGuard, ECHO_CANCELLERS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FRAME = 2048
+NEAR_START = 3.0
+GAP_START = 2.0
+GAP = 0.3
+PATHS = ["g03", "g06", "room"]
+
+def read_wav(name):
+    with wave.open(os.path.join(FIXTURES, name), "rb") as wav:
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+def run_guard(mic_name, gap=False):
+    """Play reference.wav through a guard while feeding mic_name frame by frame.
+
+    With gap, the second part of the reference is only pushed GAP after the
+    first part ran out, like a pipelined player waiting for piper.
+    """
+    ref, ref_rate = read_wav("reference.wav")
+    mic, mic_rate = read_wav(mic_name)
+    samples = np.frombuffer(mic, dtype=np.int16)
+
+    pushes = [(0.0, ref)]
+    if gap:
+        split = 2 * int(GAP_START * ref_rate)
+        pushes = [(0.0, ref[:split]), (GAP_START + GAP, ref[split:])]
+
+    now = [0.0]
+    stops = []
+    aec = EchoCanceller(rate=mic_rate, clock=lambda: now[0])
+    guard = EchoGuard(on_barge_in=lambda: stops.append(now[0]), canceller=aec)
+    aec.reset()
+
+    passed = []
+    for start in range(0, len(samples) - FRAME + 1, FRAME):
+        end = (start + FRAME) / mic_rate
+        while pushes and pushes[0][0] <= end:
+            now[0], pcm = pushes.pop(0)
+            aec.push_reference(pcm, ref_rate)
+        now[0] = end
+        out = guard.filter(samples[start:start + FRAME].tobytes())
+        if out is not None:
+            passed.append(now[0])
+
+    ECHO_CANCELLERS.remove(aec)
+    return stops, passed, aec
+
+@pytest.mark.parametrize("path", PATHS)
+def test_echo_only_is_gated_without_barge_in(path):
+    stops, passed, _ = run_guard(f"echo_only_{path}.wav")
+    assert stops == []
+    assert passed == []
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("level", ["m2db", "0db", "p1p5db"])
+def test_near_end_speech_barges_in(path, level):
+    stops, passed, _ = run_guard(f"near_{level}_{path}.wav")
+    assert len(stops) == 1
+    assert NEAR_START < stops[0] <= NEAR_START + 0.5
+    # Nothing leaks through before the user starts talking.
+    assert passed[0] >= stops[0]
+
+def test_playback_gap_is_not_barge_in():
+    stops, passed, _ = run_guard("gap_echo_only_g03.wav", gap=True)
+    assert stops == []
+    assert passed == []
+
+def test_barge_in_after_playback_gap():
+    stops, passed, _ = run_guard("gap_near_0db_g03.wav", gap=True)
+    assert len(stops) == 1
+    assert NEAR_START + GAP < stops[0] <= NEAR_START + GAP + 0.5
+    assert passed[0] >= stops[0]
+
+def test_reference_buffer_grows_in_place():
+    now = [0.0]
+    aec = EchoCanceller(clock=lambda: now[0])
+    block = np.arange(1000, dtype=np.int16).tobytes()
+    for _ in range(50):
+        aec.push_reference(block, aec.rate)
+    assert aec.n == 50000
+    assert len(aec.ref) < 2 * 50000
+    np.testing.assert_array_equal(aec.ref[49000:50000], np.arange(1000))
+
+def test_reference_is_padded_over_playback_gaps():
+    now = [0.0]
+    aec = EchoCanceller(clock=lambda: now[0])
+    block = np.ones(aec.rate, dtype=np.int16).tobytes()
+    aec.push_reference(block, aec.rate)
+    # Still playing the first second: appended directly.
+    now[0] = 0.5
+    aec.push_reference(block, aec.rate)
+    assert aec.n == 2 * aec.rate
+    # The buffered two seconds ran out half a second ago.
+    now[0] = 2.5
+    aec.push_reference(block, aec.rate)
+    assert aec.n == int(3.5 * aec.rate)
+    assert not aec.ref[2 * aec.rate:int(2.5 * aec.rate)].any()
+    assert aec.ref[int(2.5 * aec.rate):aec.n].all()
+
+@pytest.mark.parametrize("path", PATHS)
+def test_canceller_converges(path):
+    ref, ref_rate = read_wav("reference.wav")
+    mic, mic_rate = read_wav(f"echo_only_{path}.wav")
+    samples = np.frombuffer(mic, dtype=np.int16)
+
+    aec = EchoCanceller(rate=mic_rate, clock=lambda: 0.0)
+    aec.push_reference(ref, ref_rate)
+    cleaned = []
+    for start in range(0, len(samples) - FRAME + 1, FRAME):
+        out, _, _ = aec.process(samples[start:start + FRAME].tobytes(), (start + FRAME) / mic_rate)
+        cleaned.append(np.frombuffer(out, dtype=np.int16))
+
+    cleaned = np.concatenate(cleaned).astype(np.float64)
+    tail = slice(len(cleaned) - 2 * mic_rate, len(cleaned))
+    erle = 10 * np.log10(np.mean(samples[tail].astype(np.float64) ** 2) / np.mean(cleaned[tail] ** 2))
+    assert erle > 15.0
+
+def test_no_echo_path_passes_input_through():
+    stops, passed, aec = run_guard("no_echo_near.wav")
+    assert aec.no_echo
+    # Gating stops after a short warm-up instead of lasting the whole playback.
+    assert passed and passed[0] < 1.0
+    assert len(stops) == 1
+    assert NEAR_START < stops[0] <= NEAR_START + 0.5
+
+def test_guard_passes_input_when_nothing_plays():
+    now = [0.0]
+    aec = EchoCanceller(clock=lambda: now[0])
+    guard = EchoGuard(canceller=aec)
+    frame = np.zeros(FRAME, dtype=np.int16).tobytes()
+    assert guard.filter(frame) == frame
+    ECHO_CANCELLERS.remove(aec)
@@ -0,0 +1,163 @@
+import threading
+
+import pytest
+
+from mic_sessions import FairScheduler, parse_mic_sessions
+
+TIMEOUT = 2.0
+
+class Session:
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+def blocker(started=None):
+    """A job that runs until released."""
+    release = threading.Event()
+
+    def job():
+        if started is not None:
+            started.set()
+        assert release.wait(TIMEOUT)
+
+    return job, release
+
+def recorder(log, label, done=None):
+    def job():
+        log.append(label)
+        if done is not None:
+            done.set()
+    return job
+
+def test_sessions_are_served_round_robin():
+    pool = FairScheduler(1, "test")
+    gate, a, b = Session("gate"), Session("a"), Session("b")
+    started = threading.Event()
+    job, release = blocker(started)
+    pool.submit(gate, job)
+    assert started.wait(TIMEOUT)
+
+    log = []
+    done = threading.Event()
+    for i in range(3):
+        pool.submit(a, recorder(log, f"a{i}"))
+    pool.submit(b, recorder(log, "b0"))
+    pool.submit(b, recorder(log, "b1", done))
+    pool.submit(a, recorder(log, "a3"))
+    release.set()
+    assert done.wait(TIMEOUT)
+
+    # A busy mic does not get ahead of a quieter one.
+    assert log[:4] == ["a0", "b0", "a1", "b1"]
+
+def test_one_job_per_session_in_order():
+    pool = FairScheduler(3, "test")
+    session = Session("a")
+    lock = threading.Lock()
+    active = []
+    log = []
+    done = threading.Event()
+
+    def job(i):
+        with lock:
+            active.append(i)
+            overlap = len(active)
+        log.append((i, overlap))
+        threading.Event().wait(0.01)
+        with lock:
+            active.remove(i)
+        if i == 9:
+            done.set()
+
+    for i in range(10):
+        pool.submit(session, lambda i=i: job(i))
+    assert done.wait(TIMEOUT)
+    assert log == [(i, 1) for i in range(10)]
+
+def test_sessions_run_in_parallel_on_several_workers():
+    pool = FairScheduler(2, "test")
+    a_started, b_started = threading.Event(), threading.Event()
+    job_a, release_a = blocker(a_started)
+    job_b, release_b = blocker(b_started)
+    pool.submit(Session("a"), job_a)
+    pool.submit(Session("b"), job_b)
+    assert a_started.wait(TIMEOUT) and b_started.wait(TIMEOUT)
+    release_a.set()
+    release_b.set()
+
+def test_replace_drops_pending_jobs():
+    pool = FairScheduler(1, "test")
+    session = Session("a")
+    started = threading.Event()
+    job, release = blocker(started)
+    assert pool.submit(session, job) is False
+    assert started.wait(TIMEOUT)
+
+    log = []
+    done = threading.Event()
+    assert pool.submit(session, recorder(log, "old0")) is True
+    assert pool.submit(session, recorder(log, "old1")) is True
+    assert pool.submit(session, recorder(log, "new", done), replace=True) is True
+    release.set()
+    assert done.wait(TIMEOUT)
+    assert log == ["new"]
+
+def test_replace_interrupts_only_the_running_job():
+    pool = FairScheduler(1, "test")
+    session = Session("a")
+    started = threading.Event()
+    job, release = blocker(started)
+    pool.submit(session, job)
+    assert started.wait(TIMEOUT)
+
+    log = []
+    done = threading.Event()
+
+    def interrupt():
+        # The old job ends right away, like a killed aplay. The worker must
+        # still not get to the new job before interrupt() returns.
+        release.set()
+        threading.Event().wait(0.05)
+        log.append("interrupt")
+
+    assert pool.submit(session, recorder(log, "new", done), replace=True, interrupt=interrupt)
+    assert done.wait(TIMEOUT)
+    assert log == ["interrupt", "new"]
+
+def test_replace_does_not_interrupt_idle_session():
+    pool = FairScheduler(1, "test")
+    calls = []
+    done = threading.Event()
+    assert not pool.submit(Session("a"), done.set, replace=True,
+                           interrupt=lambda: calls.append(1))
+    assert done.wait(TIMEOUT)
+    assert calls == []
+
+def test_failing_job_frees_the_session(capsys):
+    pool = FairScheduler(1, "test")
+    session = Session("a")
+
+    def broken():
+        raise RuntimeError("boom")
+
+    log = []
+    done = threading.Event()
+    pool.submit(session, broken)
+    pool.submit(session, recorder(log, "next", done))
+    assert done.wait(TIMEOUT)
+    assert log == ["next"]
+    assert "[test] a: boom" in capsys.readouterr().out
+
+def test_parse_mic_sessions():
+    assert parse_mic_sessions("") == [(None, None)]
+    assert parse_mic_sessions(" 1:hi_to_en, 3:EN_TO_HI ,4") == [
+        (1, "HI_TO_EN"), (3, "EN_TO_HI"), (4, None)]
+    assert parse_mic_sessions("2:,") == [(2, None)]
+
+@pytest.mark.parametrize("spec", ["1:HI_TO_FR", "1:HINDI", "1:HI_TO_EN,2:EN-TO-ES", "x:HI_TO_EN", ":HI_TO_EN"])
+def test_parse_mic_sessions_rejects_bad_values(spec):
+    with pytest.raises(ValueError):
+        parse_mic_sessions(spec)
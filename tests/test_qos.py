@@ -0,0 +1,238 @@
+import time
+import threading
+
+import pytest
+
+import qos
+from qos import QoSScheduler, QOS_LEVELS
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def thermal(tmp_path):
+    path = tmp_path / "temp"
+
+    def set_temp(celsius):
+        path.write_text(f"{int(celsius * 1000)}\n")
+
+    set_temp(50)
+    set_temp.path = str(path)
+    return set_temp
+
+@pytest.fixture
+def rig(thermal):
+    clock = FakeClock()
+    load = {"value": 0.2}
+    applied = []
+    scheduler = QoSScheduler(target=1.5, thermal_path=thermal.path,
+                             load_fn=lambda: load["value"], clock=clock,
+                             apply_fn=applied.append)
+    return scheduler, clock, thermal, load, applied
+
+def test_hot_device_degrades_after_hold(rig):
+    scheduler, clock, thermal, _, applied = rig
+    thermal(80)
+
+    clock.now = qos.QOS_DEGRADE_HOLD - 1
+    scheduler.evaluate("test")
+    assert scheduler.level == 0
+
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.evaluate("test")
+    assert scheduler.level == 1
+    assert applied == [QOS_LEVELS[1]]
+
+    # The next step waits for another full hold period.
+    clock.now += qos.QOS_DEGRADE_HOLD - 1
+    scheduler.evaluate("test")
+    assert scheduler.level == 1
+    clock.now += 1
+    scheduler.evaluate("test")
+    assert scheduler.level == 2
+
+def test_busy_cpu_degrades(rig):
+    scheduler, clock, _, load, _ = rig
+    load["value"] = qos.QOS_LOAD_HIGH + 0.5
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.evaluate("test")
+    assert scheduler.level == 1
+
+def test_slow_utterances_degrade_and_reset_latency(rig):
+    scheduler, clock, _, _, _ = rig
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.record_latency(3.0)
+    assert scheduler.level == 1
+    # Latency measured at the old level is dropped.
+    assert scheduler.latency is None
+
+def test_latency_is_smoothed(rig):
+    scheduler, clock, _, _, _ = rig
+    scheduler.record_latency(1.0)
+    scheduler.record_latency(2.0)
+    assert scheduler.latency == pytest.approx(1.0 + qos.QOS_LATENCY_ALPHA * 1.0)
+
+def test_hold_when_between_thresholds(rig, capsys):
+    scheduler, clock, thermal, _, applied = rig
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.set_level(2, "test")
+    applied.clear()
+
+    # Warm but not hot, fast but not cool: neither degrade nor restore.
+    thermal((qos.QOS_TEMP_LOW + qos.QOS_TEMP_HIGH) / 2)
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.record_latency(0.5)
+    assert scheduler.level == 2
+    assert applied == []
+    assert "[QOS] hold level=lean" in capsys.readouterr().out
+
+def test_restore_needs_headroom_and_hold(rig):
+    scheduler, clock, thermal, _, applied = rig
+    clock.now = 100.0
+    scheduler.set_level(3, "test")
+    applied.clear()
+    thermal(60)
+
+    clock.now += qos.QOS_RESTORE_HOLD - 1
+    scheduler.evaluate("test")
+    assert scheduler.level == 3
+
+    clock.now += 1
+    scheduler.evaluate("test")
+    assert scheduler.level == 2
+    assert applied == [QOS_LEVELS[2]]
+
+    # A fast utterance keeps it restoring; a slow one would not.
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.record_latency(1.2)
+    assert scheduler.level == 2
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.latency = None
+    scheduler.record_latency(0.5)
+    assert scheduler.level == 1
+
+def test_slow_degrade_restores_only_after_fast_utterance(rig):
+    scheduler, clock, _, _, applied = rig
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.record_latency(3.0)
+    assert scheduler.level == 1
+
+    # Cool, idle and silent: no evidence the new level is fast enough.
+    for _ in range(5):
+        clock.now += qos.QOS_RESTORE_HOLD
+        scheduler.tick()
+    assert scheduler.level == 1
+
+    # Still slow at this level: degrades further, never back.
+    scheduler.record_latency(3.0)
+    assert scheduler.level == 2
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.tick()
+    assert scheduler.level == 2
+
+    # Fast but not fast enough to restore.
+    scheduler.record_latency(1.2)
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.tick()
+    assert scheduler.level == 2
+
+    scheduler.latency = None
+    scheduler.record_latency(0.5)
+    assert scheduler.level == 1
+    # Each level needs its own measurement while the slowdown lasts.
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.tick()
+    assert scheduler.level == 1
+    scheduler.record_latency(0.5)
+    assert scheduler.level == 0
+    assert [level["name"] for level in applied] == ["beam2", "lean", "beam2", "full"]
+
+def test_thermal_degrade_restores_without_utterances(rig):
+    scheduler, clock, thermal, _, _ = rig
+    thermal(80)
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.evaluate("test")
+    assert scheduler.level == 1
+
+    thermal(60)
+    clock.now += qos.QOS_RESTORE_HOLD
+    scheduler.tick()
+    assert scheduler.level == 0
+
+def test_tick_only_evaluates_every_interval(rig):
+    scheduler, clock, thermal, _, _ = rig
+    thermal(80)
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.last_check = clock.now
+    scheduler.tick()
+    assert scheduler.level == 0
+
+    clock.now += qos.QOS_INTERVAL
+    scheduler.tick()
+    assert scheduler.level == 1
+
+def test_missing_inputs_count_as_headroom(tmp_path):
+    clock = FakeClock()
+    scheduler = QoSScheduler(thermal_path=str(tmp_path / "missing"),
+                             load_fn=lambda: None, clock=clock)
+    scheduler.set_level(1, "test")
+    clock.now = qos.QOS_RESTORE_HOLD
+    scheduler.evaluate("test")
+    assert scheduler.level == 0
+
+def test_stays_within_levels(rig):
+    scheduler, clock, thermal, _, _ = rig
+    thermal(90)
+    for _ in range(len(QOS_LEVELS) + 2):
+        clock.now += qos.QOS_DEGRADE_HOLD
+        scheduler.evaluate("test")
+    assert scheduler.level == len(QOS_LEVELS) - 1
+    assert scheduler.small_vosk and not scheduler.extras
+
+def test_apply_does_not_block_other_threads(rig):
+    scheduler, clock, _, _, applied = rig
+    during = []
+
+    def apply(level):
+        # An MT worker finishing while a level is applied must not wait.
+        if not applied:
+            worker = threading.Thread(target=scheduler.record_latency, args=(5.0,))
+            worker.start()
+            worker.join(1.0)
+            during.append((worker.is_alive(), scheduler.level))
+        applied.append(level)
+
+    scheduler.apply_fn = apply
+    clock.now = qos.QOS_DEGRADE_HOLD
+    scheduler.set_level(1, "test")
+
+    assert during == [(False, 1)]
+    assert applied == [QOS_LEVELS[1]]
+
+def test_apply_follows_the_latest_level(rig):
+    scheduler, _, _, _, applied = rig
+    others = []
+
+    def apply(level):
+        if not applied:
+            # Two more changes land while the first one is still applying.
+            for target in (2, 3):
+                t = threading.Thread(target=scheduler.set_level, args=(target, "test"))
+                t.start()
+                others.append(t)
+                while scheduler.level != target:
+                    time.sleep(0.001)
+        applied.append(level)
+
+    scheduler.apply_fn = apply
+    scheduler.set_level(1, "test")
+    for t in others:
+        t.join()
+
+    # Level 2 was superseded before it could be applied.
+    assert applied == [QOS_LEVELS[1], QOS_LEVELS[3]]
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import platform
+import threading
+
+import pytest
+
+import tts
+
+TIMEOUT = 5.0
+
+pytestmark = pytest.mark.skipif(platform.system() == "Windows",
+                                reason="stub piper/aplay are shebang scripts")
+
+# Streams a short burst of silence per input line, slowly enough that there
+# is always something left to interrupt, or writes a WAV like the real piper.
+STUB_PIPER = """#!{python}
+import sys, time, wave
+args = sys.argv[1:]
+if "--output-raw" in args:
+    for line in sys.stdin:
+        time.sleep(0.2)
+        sys.stdout.buffer.write(bytes(2205 * 2))
+        sys.stdout.buffer.flush()
+else:
+    sys.stdin.read()
+    time.sleep(0.2)
+    with wave.open(args[args.index("--output_file") + 1], "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(22050)
+        wav.writeframes(bytes(22050 * 2))
+"""
+
+# Raw mode drains stdin like the real player; file mode "plays" for a while.
+STUB_APLAY = """#!{python}
+import sys, time
+if sys.argv[-1] == "-":
+    while sys.stdin.buffer.read(4096):
+        pass
+else:
+    time.sleep(3)
+"""
+
+def write_script(path, text):
+    path.write_text(text.format(python=sys.executable))
+    path.chmod(0o755)
+    return str(path)
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    piper = write_script(tmp_path / "piper", STUB_PIPER)
+    write_script(tmp_path / "aplay", STUB_APLAY)
+    monkeypatch.setattr(tts, "PIPER_BIN", piper)
+    monkeypatch.setattr(tts, "PIPER_CONFIG", str(tmp_path / "missing.json"))
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    yield
+    tts.stop_speaking()
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def tracked():
+    with tts._tts_state_lock:
+        return {cancel: list(procs) for cancel, procs in tts._tts_procs.items()}
+
+def speak_in_background(text):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(tts.speak_text_en(text) or {}))
+    thread.start()
+    return thread, result
+
+LONG_TEXT = "First sentence here. Second one follows! Third is a question? Fourth ends it."
+
+def test_split_sentences():
+    assert tts.split_sentences("One. Two! Three? Four") == ["One.", "Two!", "Three?", "Four"]
+    assert tts.split_sentences("नमस्ते। आप कैसे हैं?") == ["नमस्ते।", "आप कैसे हैं?"]
+    assert tts.split_sentences("  ") == []
+    # Short sentences keep their commas; long ones are split at clauses.
+    assert tts.split_sentences("Yes, please.") == ["Yes, please."]
+    long = "word " * 15 + "then, " + "more " * 10 + "and; the end."
+    chunks = tts.split_sentences(long)
+    assert len(chunks) == 3
+    assert chunks[0].endswith("then,") and chunks[1].endswith("and;")
+
+def test_pipelined_utterance_cleans_up(stubs):
+    stats = tts.speak_text_en(LONG_TEXT)
+    assert stats["path"] == "pipelined"
+    assert stats["chunks"] == 4
+    assert not stats["cancelled"]
+    assert stats["first_audio"] < stats["total"]
+    assert tts._tts_procs == {}
+
+def test_whole_utterance_cleans_up(stubs, monkeypatch):
+    monkeypatch.setattr(tts, "TTS_PIPELINED", False)
+    thread, result = speak_in_background(LONG_TEXT)
+    wait_for(lambda: len(sum(tracked().values(), [])) == 2)
+    tts.stop_speaking()
+    thread.join(TIMEOUT)
+    assert result["path"] == "whole"
+    assert result["cancelled"]
+    assert tts._tts_procs == {}
+
+def test_stop_speaking_kills_the_current_utterance(stubs):
+    thread, result = speak_in_background(LONG_TEXT)
+    wait_for(lambda: len(sum(tracked().values(), [])) == 2)
+    procs = sum(tracked().values(), [])
+
+    tts.stop_speaking()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
+    assert result["cancelled"]
+    assert all(proc.poll() is not None for proc in procs)
+    assert tts._tts_procs == {}
+
+def test_stop_speaking_leaves_other_processes_alone(stubs):
+    other = threading.Event()
+    sleeper = tts.subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        tts._tts_track(other, sleeper)
+        thread, result = speak_in_background(LONG_TEXT)
+        wait_for(lambda: len(tracked()) == 2)
+        tts.stop_speaking()
+        thread.join(TIMEOUT)
+        assert result["cancelled"]
+        assert sleeper.poll() is None
+        assert list(tracked()) == [other]
+    finally:
+        tts._tts_untrack(other)
+        sleeper.kill()
+        sleeper.wait()
+
+def test_new_utterance_cancels_the_previous_one(stubs):
+    first, first_result = speak_in_background(LONG_TEXT)
+    wait_for(lambda: len(sum(tracked().values(), [])) == 2)
+    first_procs = sum(tracked().values(), [])
+
+    second = tts.speak_text_en("Something else. And more.")
+    first.join(TIMEOUT)
+    assert first_result["cancelled"]
+    assert all(proc.poll() is not None for proc in first_procs)
+    assert not second["cancelled"]
+    assert second["chunks"] == 2
+    assert tts._tts_procs == {}
+
+def test_empty_text_is_not_spoken(stubs):
+    assert tts.speak_text_en("   ") is None
+    assert tts._tts_procs == {}
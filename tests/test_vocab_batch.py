@@ -0,0 +1,53 @@
+import sys
+import importlib
+
+import nltk
+import pytest
+
+import vocab_wo_stt
+
+def have_nltk_data():
+    for resource in vocab_wo_stt.NLTK_DATA.values():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            return False
+    return True
+
+needs_nltk_data = pytest.mark.skipif(not have_nltk_data(),
+                                     reason="NLTK wordnet/tagger data not installed")
+
+LINES = [
+    "The committee will commence the meeting at noon.",
+    "I am fatigued. Please assist me to purchase some food!",
+    "",
+    "They reside in a big house near the river",
+    "Can you utilize this tool? It is very helpful.",
+    "   leading and trailing spaces   ",
+    "He was lethargic after lunch, so we decided to terminate the session.",
+    "Short line",
+    "Did you recieve the pakage yesterday?",
+    "We must assist them. They have to purchase tickets. The train leaves soon.",
+    "a",
+]
+
+@needs_nltk_data
+def test_batch_matches_simplify_text_line_by_line(tmp_path):
+    src = tmp_path / "in.txt"
+    dst = tmp_path / "out.txt"
+    src.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+
+    vocab_wo_stt.run_batch(str(src), str(dst), workers=2, chunk_lines=3)
+
+    out = dst.read_text(encoding="utf-8").split("\n")
+    assert out[-1] == ""
+    assert out[:-1] == [vocab_wo_stt.simplify_text(line) for line in LINES]
+
+def test_import_does_not_download(monkeypatch):
+    # Pool workers re-import the module under spawn/forkserver.
+    def download(*args, **kwargs):
+        raise AssertionError("nltk.download called at import")
+
+    monkeypatch.setattr(nltk, "download", download)
+    monkeypatch.delitem(sys.modules, "vocab_wo_stt")
+    importlib.import_module("vocab_wo_stt")
@@ -5,9 +5,8 @@
 
 import os
 import json
-import subprocess
-import tempfile
-import platform
+import time
+import queue
 import threading
 import tkinter as tk
 import pyaudio
@@ -18,10 +17,19 @@ from deep_translator import GoogleTranslator
 
 from vosk import Model, KaldiRecognizer
 from argostranslate import translate as argostranslate
+from argostranslate import settings as argos_settings
+import ctranslate2
 from nltk.corpus import wordnet as wn
 from nltk import pos_tag
 from wordfreq import zipf_frequency
 from difflib import get_close_matches
+from collections import deque
+from functools import partial, wraps
+
+from echo_cancel import EchoGuard
+from tts import speak_text_en, speak_async, stop_speaking
+from qos import QoSScheduler
+from mic_sessions import parse_mic_sessions, FairScheduler
 
 # ================= MODE =================
 MODE = "OFFLINE"
@@ -42,12 +50,16 @@ def is_connected():
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # ================= AUTO MODEL DETECT =================
-def find_model(lang_code):
-    for name in os.listdir(BASE_DIR):
+def find_model(lang_code, small=False):
+    found = None
+    for name in sorted(os.listdir(BASE_DIR)):
         lower = name.lower()
         if lower.startswith("vosk-model") and f"-{lang_code}-" in lower:
-            return os.path.join(BASE_DIR, name)
-    return None
+            if ("-small-" in lower) == small:
+                return os.path.join(BASE_DIR, name)
+            if not small:
+                found = found or os.path.join(BASE_DIR, name)
+    return found
 
 EN_MODEL_PATH = find_model("en")
 HI_MODEL_PATH = find_model("hi")
@@ -60,6 +72,60 @@ if not HI_MODEL_PATH:
 if not ES_MODEL_PATH:
     raise FileNotFoundError("Spanish model not found.")
 
+EN_SMALL_MODEL_PATH = find_model("en", small=True)
+HI_SMALL_MODEL_PATH = find_model("hi", small=True)
+ES_SMALL_MODEL_PATH = find_model("es", small=True)
+
+# Model dirs that failed to load are not retried; a broken small model
+# falls back to the default one for that language.
+_vosk_failed = set()
+
+def vosk_model_paths(small):
+    """(en, hi, es) model dirs; a language without a usable small model keeps its default."""
+    defaults = (EN_MODEL_PATH, HI_MODEL_PATH, ES_MODEL_PATH)
+    if not small:
+        return defaults
+    smalls = (EN_SMALL_MODEL_PATH, HI_SMALL_MODEL_PATH, ES_SMALL_MODEL_PATH)
+    return tuple(s if s and s not in _vosk_failed else d for s, d in zip(smalls, defaults))
+
+# Models are shared by every session. Loading is serialized so each path is
+# loaded exactly once; audio reader threads never load, they only pick up
+# models once a background load has put them in the cache.
+_vosk_models = {}
+_vosk_loading = set()
+_vosk_load_lock = threading.Lock()
+_vosk_state_lock = threading.Lock()
+
+def load_vosk_model(path):
+    with _vosk_load_lock:
+        if path not in _vosk_models:
+            _vosk_models[path] = Model(path)
+        return _vosk_models[path]
+
+def _load_vosk_models(paths):
+    for path in paths:
+        try:
+            load_vosk_model(path)
+        except Exception as e:
+            print(f"[VOSK] failed to load {path}, not retrying: {e}")
+            with _vosk_state_lock:
+                _vosk_failed.add(path)
+        finally:
+            with _vosk_state_lock:
+                _vosk_loading.discard(path)
+
+def cached_vosk_models(paths):
+    """Models for paths if all are loaded, else start loading them and return None."""
+    with _vosk_state_lock:
+        missing = [p for p in paths if p not in _vosk_models]
+        if not missing:
+            return tuple(_vosk_models[p] for p in paths)
+        todo = [p for p in missing if p not in _vosk_loading and p not in _vosk_failed]
+        _vosk_loading.update(todo)
+    if todo:
+        threading.Thread(target=_load_vosk_models, args=(todo,), daemon=True).start()
+    return None
+
 # ================= TRANSLATOR =================
 langs = argostranslate.get_installed_languages()
 hi = next(l for l in langs if l.code == "hi")
@@ -131,7 +197,7 @@ def simplify_text(text):
         if tag.startswith("N"):
             output.append(token)
             continue
-        corrected = autocorrect(clean)
+        corrected = autocorrect(clean) if QOS.extras else clean
         wn_pos = get_wordnet_pos(tag)
         simple = get_simpler_word(corrected, wn_pos)
         output.append(token.replace(clean, simple) if simple != clean else token)
@@ -152,34 +218,65 @@ def intelligent_correction(hindi_text, english_text):
             eng += "?"
     return eng
 
-# ================= PIPER =================
-if platform.system() == "Windows":
-    PIPER_BIN = os.path.join(BASE_DIR,"piper_windows_amd64","piper","piper.exe")
-    PIPER_MODEL = os.path.join(BASE_DIR,"piper_windows_amd64","piper","en_US-lessac-medium.onnx")
-else:
-    PIPER_BIN = os.path.join(BASE_DIR,"piper","piper")
-    PIPER_MODEL = os.path.join(BASE_DIR,"piper","en_US-lessac-medium.onnx")
-    PIPER_CONFIG = PIPER_MODEL + ".json"
-
-def speak_text_en(text):
-    if not text.strip():
-        return
-
-    tmp_wav = tempfile.mktemp(".wav")
-
-    if platform.system() == "Windows":
-        subprocess.run([PIPER_BIN,"--model",PIPER_MODEL,"--output_file",tmp_wav],
-            input=text.encode("utf-8"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        if os.path.exists(tmp_wav):
-            import winsound
-            winsound.PlaySound(tmp_wav, winsound.SND_FILENAME)
-            os.remove(tmp_wav)
+# ================= ADAPTIVE QOS =================
+# qos.QoSScheduler decides the level; applying it here means argos beam size
+# and thread count, intelligent_correction/autocorrect, and small Vosk models.
+ARGOS_DEFAULT_BEAM = argos_settings.beam_size
+ARGOS_DEFAULT_THREADS = argos_settings.intra_threads
+
+_argos_reload_lock = threading.Lock()
+_argos_threads = ARGOS_DEFAULT_THREADS
+
+def reload_argos_translator(translation, threads):
+    # ctranslate2 only picks up thread counts when a model is loaded. MT
+    # workers may be inside hypotheses(), which reads .translator for every
+    # paragraph, so the replacement is built first and swapped in with a
+    # single assignment: a worker sees the old or the new one, never None.
+    stack = [translation]
+    while stack:
+        t = stack.pop()
+        if t is None:
+            continue
+        if getattr(t, "translator", None) is not None:
+            t.translator = ctranslate2.Translator(
+                str(t.pkg.package_path / "model"),
+                device=argos_settings.device,
+                inter_threads=argos_settings.inter_threads,
+                intra_threads=threads,
+                compute_type=argos_settings.compute_type,
+            )
+        stack.extend(getattr(t, attr, None) for attr in ("underlying", "t1", "t2"))
+
+def _reload_argos_translators():
+    # Runs on its own thread so no MT worker stalls on the reload. Models are
+    # rebuilt one at a time, so at most one extra model is in memory; a level
+    # change arriving meanwhile waits here and reloads for its own count.
+    global _argos_threads
+    with _argos_reload_lock:
+        threads = argos_settings.intra_threads
+        if threads == _argos_threads:
+            return
+        start = time.perf_counter()
+        for t in (translator_hi_en, translator_en_hi, translator_es_en, translator_en_es):
+            reload_argos_translator(t, threads)
+        _argos_threads = threads
+        print(f"[QOS] argos translators reloaded with {threads} threads "
+              f"in {time.perf_counter() - start:.1f}s")
+
+def apply_qos_level(level):
+    argos_settings.beam_size = level["beam"] or ARGOS_DEFAULT_BEAM
+    threads = ARGOS_DEFAULT_THREADS if level["threads"] is None else level["threads"]
+    if argos_settings.intra_threads != threads:
+        argos_settings.intra_threads = threads
+        threading.Thread(target=_reload_argos_translators, daemon=True).start()
+
+    paths = vosk_model_paths(level["small_vosk"])
+    if level["small_vosk"] and paths == vosk_model_paths(False):
+        print("[QOS] no usable vosk-model-small-*, keeping the default Vosk models")
     else:
-        subprocess.run([PIPER_BIN,"-m",PIPER_MODEL,"-c",PIPER_CONFIG,"-f",tmp_wav],
-            input=text.encode("utf-8"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        if os.path.exists(tmp_wav):
-            subprocess.run(["aplay",tmp_wav])
-            os.remove(tmp_wav)
+        cached_vosk_models(paths)
+
+QOS = QoSScheduler(apply_fn=apply_qos_level)
 
 # ================= ONLINE PROCESS =================
 def online_process(ui, recognizer, listening_mode):
@@ -229,7 +326,7 @@ def online_process(ui, recognizer, listening_mode):
         ui.last_hindi = text
         ui.last_english = translated
 
-        ui.show_translation(translated)
+        ui.show_translation(translated, text)
         speak_text_en(translated)
 
     except:
@@ -237,130 +334,236 @@ def online_process(ui, recognizer, listening_mode):
 
     return listening_mode
 
-# ================= ASSISTANT LOOP =================
-def assistant_loop(ui):
-
-    hindi_model = Model(HI_MODEL_PATH)
-    english_model = Model(EN_MODEL_PATH)
-    spanish_model = Model(ES_MODEL_PATH)
-
-    p = pyaudio.PyAudio()
-
-    ui.show_waiting()
+# ================= MIC SESSIONS =================
+# One process can serve several microphones. Each MicSession has its own
+# stream, KaldiRecognizers and wake/listen state, while the Vosk models and
+# argos translators are loaded once and shared. MIC_SESSIONS lists PyAudio
+# input device indices, optionally pinned to a language mode, e.g.
+# "1:HI_TO_EN,3:EN_TO_HI". Sessions without a mode follow the Lang/Swap buttons.
+MIC_SESSIONS = os.environ.get("MIC_SESSIONS", "")
+MT_WORKERS = int(os.environ.get("MT_WORKERS", "2"))
+LATENCY_WINDOW = 50
+MIC_SESSION_SPECS = parse_mic_sessions(MIC_SESSIONS)
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
 
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=1,
-                    rate=16000,
-                    input=True,
-                    frames_per_buffer=2048)
+def make_recognizers(models):
+    english_model, hindi_model, spanish_model = models
 
     en_cmd_rec = KaldiRecognizer(english_model,16000)
     en_rec = KaldiRecognizer(english_model,16000)
     hi_rec = KaldiRecognizer(hindi_model,16000)
     es_rec = KaldiRecognizer(spanish_model,16000)
+    return en_cmd_rec, en_rec, hi_rec, es_rec
+
+def translate_utterance(lang_mode, spoken_text):
+    if lang_mode == "HI_TO_EN":
+        english_raw = translator_hi_en.translate(spoken_text)
+        if QOS.extras:
+            return intelligent_correction(spoken_text, english_raw)
+        return english_raw
+    if lang_mode == "EN_TO_HI":
+        return translator_en_hi.translate(spoken_text)
+    if lang_mode == "ES_TO_EN":
+        return translator_es_en.translate(spoken_text)
+    if lang_mode == "EN_TO_ES":
+        return translator_en_es.translate(spoken_text)
+    return None
 
-    recognizer_online = sr.Recognizer()
-    listening_mode = False
-
-    while True:
-
-        if MODE == "ONLINE":
-            if not is_connected():
-                ui.show_no_network()
-                continue
-
-            listening_mode = online_process(ui, recognizer_online, listening_mode)
-            continue
-
-        data = stream.read(2048, exception_on_overflow=False)
+class MicSession:
 
-        if en_cmd_rec.AcceptWaveform(data):
-            cmd = json.loads(en_cmd_rec.Result()).get("text","").lower()
+    def __init__(self, name, device_index, lang_mode, mt_pool, tts_pool, label=""):
+        self.name = name
+        self.device_index = device_index
+        self.fixed_lang_mode = lang_mode
+        self.mt_pool = mt_pool
+        self.tts_pool = tts_pool
+        self.label = label
+        self.listening_mode = False
+        self.last_hindi = None
+        self.last_english = None
+        self.model_paths = None
+        self.stream = None
+        self.echo_guard = EchoGuard(on_barge_in=stop_speaking)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def lang_mode(self):
+        return self.fixed_lang_mode or LANG_MODE
+
+    def build_recognizers(self, paths, models):
+        self.model_paths = paths
+        self.en_cmd_rec, self.en_rec, self.hi_rec, self.es_rec = make_recognizers(models)
+
+    def reset_recognizers(self):
+        for rec in (self.en_cmd_rec, self.en_rec, self.hi_rec, self.es_rec):
+            rec.Reset()
+
+    def recognizer_for(self, lang_mode):
+        if lang_mode == "HI_TO_EN":
+            return self.hi_rec
+        if lang_mode == "ES_TO_EN":
+            return self.es_rec
+        return self.en_rec
+
+    def open(self, pa):
+        # Models are shared: only the first session actually loads them, so
+        # the recognizer figure is the real cost of each extra mic.
+        start = current_rss_mb()
+        paths = vosk_model_paths(QOS.small_vosk)
+        models = tuple(load_vosk_model(path) for path in paths)
+        before = current_rss_mb()
+        self.build_recognizers(paths, models)
+        after = current_rss_mb()
+        if start is not None and after is not None:
+            print(f"[{self.name}] models +{before - start:.1f} MB, "
+                  f"recognizers +{after - before:.1f} MB (RSS {after:.0f} MB)")
+
+        self.stream = pa.open(format=pyaudio.paInt16,
+                              channels=1,
+                              rate=16000,
+                              input=True,
+                              input_device_index=self.device_index,
+                              frames_per_buffer=2048)
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+        avg = sum(self.latencies) / len(self.latencies)
+        print(f"[{self.name}] latency {seconds:.2f}s (avg {avg:.2f}s over {len(self.latencies)})")
+        QOS.record_latency(seconds)
+
+    def handle_utterance(self, ui, spoken_text, lang_mode, frame_start):
+        translated = translate_utterance(lang_mode, spoken_text)
+        if not translated:
+            return
+
+        self.last_hindi = spoken_text
+        self.last_english = translated
+        ui.last_hindi = self.label + spoken_text
+        ui.last_english = translated
 
-            if not listening_mode and "hello" in cmd:
-                listening_mode = True
-                en_cmd_rec.Reset()
-                en_rec.Reset()
-                hi_rec.Reset()
-                ui.set_listening_mode()
-                ui.show_listening()
+        ui.show_translation(translated, self.label + spoken_text)
+        self.record_latency(time.perf_counter() - frame_start)
 
-            elif listening_mode and any(c in cmd for c in ["stop","pause"]):
-                listening_mode = False
-                en_cmd_rec.Reset()
-                en_rec.Reset()
-                hi_rec.Reset()
-                ui.show_waiting()
-                ui.set_idle_mode()
+        # A newer utterance from the same mic replaces its own pending or
+        # playing speech; other mics wait for their turn.
+        self.tts_pool.submit(self, partial(speak_text_en, translated),
+                             replace=True, interrupt=stop_speaking)
 
-        if listening_mode:
+    def run(self, ui):
 
-            if LANG_MODE == "HI_TO_EN" and hi_rec.AcceptWaveform(data):
+        while True:
 
-                spoken_text = json.loads(hi_rec.Result()).get("text","")
-                if not spoken_text:
-                    continue
+            data = self.stream.read(2048, exception_on_overflow=False)
 
-                ui.show_hindi(spoken_text)
+            if MODE == "ONLINE":
+                continue
 
-                english_raw = translator_hi_en.translate(spoken_text)
-                english = intelligent_correction(spoken_text, english_raw)
+            paths = vosk_model_paths(QOS.small_vosk)
+            if paths != self.model_paths:
+                # Keeps the current recognizers until the models are loaded.
+                models = cached_vosk_models(paths)
+                if models:
+                    self.build_recognizers(paths, models)
+                    print(f"[{self.name}] vosk models -> {'small' if QOS.small_vosk else 'default'}")
 
-                ui.last_hindi = spoken_text
-                ui.last_english = english
+            data = self.echo_guard.filter(data)
+            if data is None:
+                continue
 
-                ui.show_translation(english)
-                speak_text_en(english)
+            frame_start = time.perf_counter()
 
-            elif LANG_MODE == "EN_TO_HI" and en_rec.AcceptWaveform(data):
+            if self.en_cmd_rec.AcceptWaveform(data):
+                cmd = json.loads(self.en_cmd_rec.Result()).get("text","").lower()
 
-                spoken_text = json.loads(en_rec.Result()).get("text","")
-                if not spoken_text:
-                    continue
+                if not self.listening_mode and "hello" in cmd:
+                    self.listening_mode = True
+                    self.reset_recognizers()
+                    ui.set_listening_mode()
+                    ui.show_listening()
 
-                ui.show_hindi(spoken_text)
+                elif self.listening_mode and any(c in cmd for c in ["stop","pause"]):
+                    self.listening_mode = False
+                    self.reset_recognizers()
+                    ui.show_waiting()
+                    ui.set_idle_mode()
 
-                hindi_text = translator_en_hi.translate(spoken_text)
+            if not self.listening_mode:
+                continue
 
-                ui.last_hindi = spoken_text
-                ui.last_english = hindi_text
+            lang_mode = self.lang_mode
+            rec = self.recognizer_for(lang_mode)
+            if not rec.AcceptWaveform(data):
+                continue
 
-                ui.show_translation(hindi_text)
-                speak_text_en(hindi_text)
+            spoken_text = json.loads(rec.Result()).get("text","")
+            if not spoken_text:
+                continue
 
-            elif LANG_MODE == "ES_TO_EN" and es_rec.AcceptWaveform(data):
+            ui.show_hindi(self.label + spoken_text)
+            self.mt_pool.submit(self, partial(self.handle_utterance, ui, spoken_text, lang_mode, frame_start))
 
-                spoken_text = json.loads(es_rec.Result()).get("text","")
-                if not spoken_text:
-                    continue
+# ================= ASSISTANT LOOP =================
+def assistant_loop(ui):
 
-                ui.show_hindi(spoken_text)
+    p = pyaudio.PyAudio()
 
-                english = translator_es_en.translate(spoken_text)
+    ui.show_waiting()
 
-                ui.last_hindi = spoken_text
-                ui.last_english = english
+    mt_pool = FairScheduler(MT_WORKERS, "mt")
+    tts_pool = FairScheduler(1, "tts")
 
-                ui.show_translation(english)
-                speak_text_en(english)
+    specs = MIC_SESSION_SPECS
+    sessions = []
+    for device_index, lang_mode in specs:
+        name = "mic" if device_index is None else f"mic{device_index}"
+        label = f"{name}: " if len(specs) > 1 else ""
+        session = MicSession(name, device_index, lang_mode, mt_pool, tts_pool, label)
+        session.open(p)
+        sessions.append(session)
 
-            elif LANG_MODE == "EN_TO_ES" and en_rec.AcceptWaveform(data):
+    for session in sessions:
+        threading.Thread(target=session.run, args=(ui,), name=session.name, daemon=True).start()
 
-                spoken_text = json.loads(en_rec.Result()).get("text","")
-                if not spoken_text:
-                    continue
+    recognizer_online = sr.Recognizer()
+    listening_mode = False
 
-                ui.show_hindi(spoken_text)
+    while True:
 
-                spanish = translator_en_es.translate(spoken_text)
+        if MODE == "ONLINE":
+            if not is_connected():
+                ui.show_no_network()
+                time.sleep(1)
+                continue
 
-                ui.last_hindi = spoken_text
-                ui.last_english = spanish
+            listening_mode = online_process(ui, recognizer_online, listening_mode)
+            continue
 
-                ui.show_translation(spanish)
-                speak_text_en(spanish)
+        QOS.tick()
+        time.sleep(0.1)
 
 # ================= GUI =================
+UI_POLL_MS = 50
+
+def on_ui_thread(method):
+    # Tk is not thread-safe: calls from the mic/MT threads are queued and
+    # run by the main loop in poll_ui_calls.
+    @wraps(method)
+    def wrapper(self, *args):
+        if threading.current_thread() is threading.main_thread():
+            method(self, *args)
+        else:
+            self.ui_calls.put((method, args))
+    return wrapper
+
 class ModernTranslatorUI:
 
     def __init__(self, root):
@@ -373,10 +576,21 @@ class ModernTranslatorUI:
         self.last_hindi = None
         self.last_english = None
 
+        self.ui_calls = queue.Queue()
         self.build_ui()
+        self.poll_ui_calls()
 
         threading.Thread(target=assistant_loop,args=(self,),daemon=True).start()
 
+    def poll_ui_calls(self):
+        while True:
+            try:
+                method, args = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            method(self, *args)
+        self.root.after(UI_POLL_MS, self.poll_ui_calls)
+
     def build_ui(self):
 
         top_frame = tk.Frame(self.root, bg="#000000")
@@ -464,23 +678,28 @@ class ModernTranslatorUI:
             LANG_MODE = "HI_TO_EN"
             self.english_label.config(text="Mode: Hindi → English")
 
+    @on_ui_thread
     def show_waiting(self):
         self.hindi_label.config(text="")
         self.english_label.config(text="Waiting for wake word...")
         self.set_idle_mode()
 
+    @on_ui_thread
     def show_listening(self):
         self.hindi_label.config(text="")
         self.english_label.config(text="Listening...")
 
+    @on_ui_thread
     def show_hindi(self, text):
         self.hindi_label.config(text="")
         self.english_label.config(text=text)
 
-    def show_translation(self, text):
-        self.hindi_label.config(text=self.last_hindi)
+    @on_ui_thread
+    def show_translation(self, text, source=None):
+        self.hindi_label.config(text=self.last_hindi if source is None else source)
         self.english_label.config(text=text)
 
+    @on_ui_thread
     def show_no_network(self):
         self.hindi_label.config(text="")
         self.english_label.config(text="❌ No Internet Connection")
@@ -489,11 +708,13 @@ class ModernTranslatorUI:
         if self.last_english:
             simplified = simplify_text(self.last_english)
             self.english_label.config(text=simplified)
-            speak_text_en(simplified)
+            speak_async(simplified)
 
+    @on_ui_thread
     def set_idle_mode(self):
         self.light_canvas.itemconfig(self.light, fill="gray")
 
+    @on_ui_thread
     def set_listening_mode(self):
         self.light_canvas.itemconfig(self.light, fill="#00FF00")
 
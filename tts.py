@@ -0,0 +1,245 @@
+# ============================================================
+# Piper text-to-speech for the translator
+# ============================================================
+# Long translations are split into sentences/clauses and fed line by line to
+# a single piper process. Piper streams raw audio for each line as soon as it
+# is synthesized; a producer thread collects it while the caller plays it into
+# one continuous output stream, so the first sentence is heard while the rest
+# is still being synthesized and there are no gaps between sentences.
+
+import os
+import re
+import json
+import time
+import queue
+import subprocess
+import tempfile
+import platform
+import threading
+import wave
+
+from echo_cancel import echo_reset, echo_push, echo_end
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ================= PIPER =================
+if platform.system() == "Windows":
+    PIPER_BIN = os.path.join(BASE_DIR,"piper_windows_amd64","piper","piper.exe")
+    PIPER_MODEL = os.path.join(BASE_DIR,"piper_windows_amd64","piper","en_US-lessac-medium.onnx")
+else:
+    PIPER_BIN = os.path.join(BASE_DIR,"piper","piper")
+    PIPER_MODEL = os.path.join(BASE_DIR,"piper","en_US-lessac-medium.onnx")
+PIPER_CONFIG = PIPER_MODEL + ".json"
+
+# ================= SENTENCE PIPELINED TTS =================
+TTS_PIPELINED = True
+TTS_CLAUSE_CHARS = 80
+TTS_READ_BYTES = 4096
+
+_tts_state_lock = threading.Lock()
+_tts_play_lock = threading.Lock()
+_tts_cancel = None
+_tts_procs = {}
+_pyaudio = None
+
+def split_sentences(text):
+    parts = re.split(r"(?<=[.!?।])\s+", text.strip())
+    chunks = []
+    for part in parts:
+        if len(part) > TTS_CLAUSE_CHARS:
+            chunks.extend(c for c in re.split(r"(?<=[,;:])\s+", part) if c)
+        elif part:
+            chunks.append(part)
+    return chunks
+
+def piper_sample_rate():
+    try:
+        with open(PIPER_CONFIG, encoding="utf-8") as f:
+            return json.load(f)["audio"]["sample_rate"]
+    except (OSError, KeyError, ValueError):
+        return 22050
+
+def piper_command(*args):
+    if platform.system() == "Windows":
+        return [PIPER_BIN,"--model",PIPER_MODEL,*args]
+    return [PIPER_BIN,"-m",PIPER_MODEL,"-c",PIPER_CONFIG,*args]
+
+def stop_speaking():
+    """Cancel the current utterance and kill its piper/aplay processes."""
+    with _tts_state_lock:
+        if _tts_cancel is not None:
+            _tts_cancel.set()
+            for proc in _tts_procs.get(_tts_cancel, []):
+                if proc.poll() is None:
+                    proc.kill()
+    if platform.system() == "Windows":
+        import winsound
+        winsound.PlaySound(None, 0)
+
+def _tts_track(cancel, *procs):
+    with _tts_state_lock:
+        _tts_procs.setdefault(cancel, []).extend(procs)
+        if cancel.is_set():
+            for proc in procs:
+                proc.kill()
+
+def _tts_untrack(cancel):
+    with _tts_state_lock:
+        _tts_procs.pop(cancel, None)
+
+def _echo_reference_wav(path):
+    try:
+        with wave.open(path, "rb") as wav:
+            echo_push(wav.readframes(wav.getnframes()), wav.getframerate())
+    except (OSError, wave.Error):
+        pass
+
+def _speak_whole(text, cancel, mark_first):
+    tmp_wav = tempfile.mktemp(".wav")
+
+    piper = subprocess.Popen(piper_command("--output_file",tmp_wav),
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _tts_track(cancel, piper)
+    piper.communicate(text.encode("utf-8"))
+
+    if not os.path.exists(tmp_wav):
+        return
+
+    if not cancel.is_set():
+        _echo_reference_wav(tmp_wav)
+        if platform.system() == "Windows":
+            import winsound
+            mark_first()
+            winsound.PlaySound(tmp_wav, winsound.SND_FILENAME)
+        else:
+            player = subprocess.Popen(["aplay","-q",tmp_wav])
+            _tts_track(cancel, player)
+            mark_first()
+            player.wait()
+    os.remove(tmp_wav)
+
+def _open_raw_player(rate, cancel):
+    """Return (write, close) for one continuous 16-bit mono output stream."""
+    global _pyaudio
+
+    if platform.system() == "Windows":
+        import pyaudio
+        if _pyaudio is None:
+            _pyaudio = pyaudio.PyAudio()
+        stream = _pyaudio.open(format=pyaudio.paInt16, channels=1, rate=rate, output=True)
+
+        def close():
+            stream.stop_stream()
+            stream.close()
+
+        return stream.write, close
+
+    player = subprocess.Popen(["aplay","-q","-t","raw","-f","S16_LE","-c","1",
+                               "-r",str(rate),"-"],
+        stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    _tts_track(cancel, player)
+
+    def close():
+        try:
+            player.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        player.wait()
+
+    return player.stdin.write, close
+
+def _speak_pipelined(chunks, cancel, mark_first):
+    piper = subprocess.Popen(piper_command("--output-raw"),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    _tts_track(cancel, piper)
+    rate = piper_sample_rate()
+    write, close = _open_raw_player(rate, cancel)
+
+    pcm = queue.Queue()
+
+    def produce():
+        try:
+            while True:
+                block = piper.stdout.read1(TTS_READ_BYTES)
+                if not block:
+                    break
+                pcm.put(block)
+        except (OSError, ValueError):
+            pass
+        pcm.put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        # Piper synthesizes each stdin line separately and streams it out.
+        piper.stdin.write("".join(c.replace("\n"," ") + "\n" for c in chunks).encode("utf-8"))
+        piper.stdin.close()
+    except (BrokenPipeError, OSError):
+        pass
+
+    try:
+        while True:
+            block = pcm.get()
+            if block is None or cancel.is_set():
+                break
+            mark_first()
+            echo_push(block, rate)
+            write(block)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        close()
+
+    if cancel.is_set() and piper.poll() is None:
+        piper.kill()
+    piper.wait()
+
+def speak_text_en(text):
+    """Speak text, cancelling whatever is still playing. Returns timing stats."""
+    global _tts_cancel
+
+    if not text.strip():
+        return None
+
+    # A new utterance always wins over whatever is still playing.
+    stop_speaking()
+    cancel = threading.Event()
+    with _tts_state_lock:
+        _tts_cancel = cancel
+
+    with _tts_play_lock:
+        if cancel.is_set():
+            return None
+
+        start = time.perf_counter()
+        first_audio = []
+
+        def mark_first():
+            if not first_audio:
+                first_audio.append(time.perf_counter() - start)
+
+        chunks = split_sentences(text)
+        path = "pipelined" if TTS_PIPELINED and len(chunks) > 1 else "whole"
+        echo_reset()
+
+        try:
+            if path == "pipelined":
+                _speak_pipelined(chunks, cancel, mark_first)
+            else:
+                _speak_whole(text, cancel, mark_first)
+        finally:
+            echo_end()
+            _tts_untrack(cancel)
+
+        total = time.perf_counter() - start
+        stats = {"path": path, "chunks": len(chunks), "chars": len(text),
+                 "first_audio": first_audio[0] if first_audio else total,
+                 "total": total, "cancelled": cancel.is_set()}
+        print(f"[TTS] {path} chunks={len(chunks)} chars={len(text)} "
+              f"first_audio={stats['first_audio']:.2f}s "
+              f"total={total:.2f}s{' (cancelled)' if cancel.is_set() else ''}")
+        return stats
+
+def speak_async(text):
+    # Playback runs beside the microphone loop so barge-in can interrupt it.
+    threading.Thread(target=speak_text_en, args=(text,), daemon=True).start()
@@ -1,14 +1,33 @@
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
 import nltk
 from nltk.corpus import wordnet as wn
-from nltk import pos_tag
+from nltk import pos_tag, pos_tag_sents
 from wordfreq import zipf_frequency
 from difflib import get_close_matches
 
 # -------------------------
 # REQUIRED NLTK DATA
 # -------------------------
-nltk.download("wordnet", quiet=True)
-nltk.download("averaged_perceptron_tagger_eng", quiet=True)
+NLTK_DATA = {
+    "wordnet": "corpora/wordnet",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+}
+
+def ensure_nltk_data():
+    # Called once from the entry point, not at import: batch workers re-import
+    # this module under spawn/forkserver and must not go to the network.
+    for package, resource in NLTK_DATA.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
 
 # -------------------------
 # AUX VERBS (DO NOT TOUCH)
@@ -53,8 +72,17 @@ def get_wordnet_pos(treebank_tag):
 # -------------------------
 # OFFLINE AUTOCORRECT
 # -------------------------
+_WN_WORDS = None
+
+def wordnet_words():
+    # Materialised once; wn.words() rebuilds the whole lemma list per call.
+    global _WN_WORDS
+    if _WN_WORDS is None:
+        _WN_WORDS = list(wn.words())
+    return _WN_WORDS
+
 def autocorrect(word):
-    matches = get_close_matches(word, wn.words(), n=1, cutoff=0.85)
+    matches = get_close_matches(word, wordnet_words(), n=1, cutoff=0.85)
     return matches[0] if matches else word
 
 # -------------------------
@@ -90,27 +118,35 @@ def get_simpler_word(word, pos=None):
 
     return word
 
+# -------------------------
+# WORD DECISION (MEMOIZED)
+# -------------------------
+# The same (word, tag) pairs come up over and over in a corpus, and
+# autocorrect is by far the slowest step, so decisions are cached per process.
+# The cache is bounded so memory stays flat however large the input is.
+WORD_CACHE_SIZE = 200_000
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def simplify_word(clean, tag):
+    # Do not touch auxiliary verbs
+    if clean in AUX_VERBS:
+        return clean
+
+    # Fix spelling first
+    corrected = autocorrect(clean)
+
+    wn_pos = get_wordnet_pos(tag)
+    return get_simpler_word(corrected, wn_pos)
+
 # -------------------------
 # TEXT SIMPLIFIER
 # -------------------------
-def simplify_text(text):
-    tokens = text.split()
-    tagged = pos_tag(tokens)
+def simplify_tagged(tagged):
     output = []
 
     for token, tag in tagged:
         clean = token.strip(".,?!").lower()
-
-        # Do not touch auxiliary verbs
-        if clean in AUX_VERBS:
-            output.append(token)
-            continue
-
-        # Fix spelling first
-        corrected = autocorrect(clean)
-
-        wn_pos = get_wordnet_pos(tag)
-        simple = get_simpler_word(corrected, wn_pos)
+        simple = simplify_word(clean, tag)
 
         if simple != clean:
             output.append(token.replace(clean, simple))
@@ -119,24 +155,125 @@ def simplify_text(text):
 
     return " ".join(output)
 
+def simplify_text(text):
+    return simplify_tagged(pos_tag(text.split()))
+
+# -------------------------
+# BATCH MODE
+# -------------------------
+CHUNK_LINES = 1000
+REPORT_EVERY = 20
+
+def read_chunks(path, size):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        chunk = []
+        for line in f:
+            chunk.append(line.rstrip("\r\n"))
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def simplify_lines(lines):
+    """Simplify one chunk of lines. Returns (output lines, token count)."""
+    # Each line is tagged as a whole, exactly like simplify_text, but with
+    # one tagger call for the whole chunk instead of one per line.
+    tokens = [line.split() for line in lines]
+    output = [simplify_tagged(tagged) for tagged in pos_tag_sents(tokens)]
+    return output, sum(len(t) for t in tokens)
+
+def peak_memory_mb(who="self"):
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def report(label, lines, tokens, start):
+    elapsed = time.perf_counter() - start
+    rate = tokens / elapsed if elapsed > 0 else 0.0
+    mem = peak_memory_mb()
+    mem_text = f", peak RSS {mem:.0f} MB" if mem is not None else ""
+    print(f"[{label}] {lines} lines, {tokens} tokens, {elapsed:.1f}s, "
+          f"{rate:.0f} tokens/sec{mem_text}", file=sys.stderr)
+
+def run_batch(src, dst=None, workers=None, chunk_lines=CHUNK_LINES):
+    workers = workers or os.cpu_count() or 1
+    out = open(dst, "w", encoding="utf-8") if dst else sys.stdout
+    start = time.perf_counter()
+    lines = tokens = chunks = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Only a few chunks are in flight at a time, and they are written
+            # back in submission order, so output order matches the input.
+            pending = deque()
+
+            def flush_oldest():
+                nonlocal lines, tokens, chunks
+                done, count = pending.popleft().result()
+                out.write("\n".join(done) + "\n")
+                lines += len(done)
+                tokens += count
+                chunks += 1
+                if chunks % REPORT_EVERY == 0:
+                    report("progress", lines, tokens, start)
+
+            for chunk in read_chunks(src, chunk_lines):
+                pending.append(pool.submit(simplify_lines, chunk))
+                if len(pending) >= workers * 2:
+                    flush_oldest()
+
+            while pending:
+                flush_oldest()
+    finally:
+        if dst:
+            out.close()
+
+    report("done", lines, tokens, start)
+    worker_mem = peak_memory_mb("children")
+    if worker_mem is not None:
+        print(f"[done] largest worker peak RSS {worker_mem:.0f} MB", file=sys.stderr)
+
 # -------------------------
 # INTERACTIVE LOOP
 # -------------------------
-print("\n--- ✅ AUTO VOCAB SIMPLIFIER (STABLE & OFFLINE) ---")
+def interactive():
+    print("\n--- ✅ AUTO VOCAB SIMPLIFIER (STABLE & OFFLINE) ---")
+
+    current = input("\nEnter text:\n> ")
 
-current = input("\nEnter text:\n> ")
+    while True:
+        cmd = input("\nType 'simplify' or 'understood':\n> ").lower()
 
-while True:
-    cmd = input("\nType 'simplify' or 'understood':\n> ").lower()
+        if cmd == "simplify":
+            current = simplify_text(current)
+            print("\n--- SIMPLIFIED ---")
+            print(current)
 
-    if cmd == "simplify":
-        current = simplify_text(current)
-        print("\n--- SIMPLIFIED ---")
-        print(current)
+        elif cmd == "understood":
+            print("\n✅ Done.")
+            break
 
-    elif cmd == "understood":
-        print("\n✅ Done.")
-        break
+        else:
+            print("\n❌ Unknown command. Type 'simplify' or 'understood'")
+
+# -------------------------
+# ENTRY POINT
+# -------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline vocabulary simplifier")
+    parser.add_argument("input", nargs="?", help="text file to simplify in batch mode")
+    parser.add_argument("-o", "--output", help="write simplified text here (default: stdout)")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES, help="lines per work item")
+    args = parser.parse_args()
 
+    ensure_nltk_data()
+    if args.input:
+        run_batch(args.input, args.output, args.workers, args.chunk_lines)
     else:
-        print("\n❌ Unknown command. Type 'simplify' or 'understood'")
+        interactive()